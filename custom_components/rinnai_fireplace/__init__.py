@@ -5,16 +5,28 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, Platform
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import Store
 from homeassistant.loader import async_get_loaded_integration
 
 from .api import RinnaiFireplaceApiClient
-from .const import CONF_IP
+from .command_queue import STORAGE_VERSION, RinnaiFireplaceCommandQueue, storage_key
+from .const import (
+    CONF_IP,
+    CONF_MAX_RETRIES,
+    CONF_TIMEOUT,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_TIMEOUT_SECS,
+    DOMAIN,
+)
 from .coordinator import RinnaiFireplaceDataUpdateCoordinator
 from .data import RinnaiFireplaceData
+from .services import async_setup_services
 
 if TYPE_CHECKING:
     from homeassistant.core import HomeAssistant
+    from homeassistant.helpers.typing import ConfigType
 
     from .data import RinnaiFireplaceConfigEntry
 
@@ -22,6 +34,14 @@ PLATFORMS: list[Platform] = [
     Platform.CLIMATE,
 ]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:  # noqa: ARG001 Unused function argument: `config`
+    """Set up the integration services."""
+    async_setup_services(hass)
+    return True
+
 
 # https://developers.home-assistant.io/docs/config_entries_index/#setting-up-an-entry
 async def async_setup_entry(
@@ -31,16 +51,25 @@ async def async_setup_entry(
     """Set up this integration using UI."""
     coordinator = RinnaiFireplaceDataUpdateCoordinator(hass=hass, config_entry=entry)
     entry.runtime_data = RinnaiFireplaceData(
-        client=RinnaiFireplaceApiClient(entry.data[CONF_IP]),
+        client=RinnaiFireplaceApiClient(
+            entry.data[CONF_IP],
+            timeout=entry.options.get(CONF_TIMEOUT, DEFAULT_TIMEOUT_SECS),
+            max_retries=entry.options.get(CONF_MAX_RETRIES, DEFAULT_MAX_RETRIES),
+        ),
         integration=async_get_loaded_integration(hass, entry.domain),
         coordinator=coordinator,
+        commands=RinnaiFireplaceCommandQueue(hass, entry),
+    )
+    await entry.runtime_data.commands.async_load()
+    entry.async_on_unload(
+        coordinator.async_add_listener(entry.runtime_data.commands.async_handle_update)
     )
 
     # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
     await coordinator.async_config_entry_first_refresh()
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    entry.async_on_unload(entry.add_update_listener(async_update_entry))
 
     return True
 
@@ -53,6 +82,25 @@ async def async_unload_entry(
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
 
+async def async_remove_entry(
+    hass: HomeAssistant,
+    entry: RinnaiFireplaceConfigEntry,
+) -> None:
+    """Drop the commands still queued for a removed entry."""
+    await Store(hass, STORAGE_VERSION, storage_key(entry.entry_id)).async_remove()
+
+
+async def async_update_entry(
+    hass: HomeAssistant,
+    entry: RinnaiFireplaceConfigEntry,
+) -> None:
+    """Apply entry changes, reloading only when the device itself changed."""
+    if entry.data[CONF_IP] != entry.runtime_data.client.host:
+        await async_reload_entry(hass, entry)
+        return
+    await entry.runtime_data.coordinator.async_apply_options()
+
+
 async def async_reload_entry(
     hass: HomeAssistant,
     entry: RinnaiFireplaceConfigEntry,
@@ -0,0 +1,354 @@
+"""Command-line probe and load generator for Rinnai Fireplace devices."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+
+from . import tracing
+from .api import (
+    Eco,
+    OperationalState,
+    RinnaiFireplaceApiClient,
+    RinnaiFireplaceApiClientEmptyPayloadError,
+)
+from .discovery import (
+    SWEEP_CONCURRENCY,
+    SWEEP_MAX_HOSTS,
+    TIMEOUT_SEC,
+    async_sniff,
+    sweep,
+)
+from .simulator import RinnaiFireplaceSimulator
+
+
+def _echo(message: str = "") -> None:
+    """Write a line of output."""
+    print(message)  # noqa: T201
+
+
+def _parse_host(value: str) -> tuple[str, int]:
+    """Split a host[:port] argument."""
+    host, sep, port = value.rpartition(":")
+    if not sep:
+        return value, RinnaiFireplaceApiClient.PORT
+    return host, int(port)
+
+
+def _client(args: argparse.Namespace, host: str) -> RinnaiFireplaceApiClient:
+    """Create a client for a host[:port] argument."""
+    return RinnaiFireplaceApiClient(
+        *_parse_host(host), timeout=args.timeout, max_retries=args.retries
+    )
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+@dataclass
+class ProbeStats:
+    """Outcome of the requests sent to one host."""
+
+    latencies: list[float] = field(default_factory=list)
+    """Latency in seconds of every request, successful or not."""
+    ok: int = 0
+    empty: int = 0
+    errors: Counter[str] = field(default_factory=Counter)
+
+    @property
+    def total(self) -> int:
+        """Number of requests sent."""
+        return self.ok + self.empty + self.errors.total()
+
+    def merge(self, other: ProbeStats) -> None:
+        """Add the results of another host."""
+        self.latencies.extend(other.latencies)
+        self.ok += other.ok
+        self.empty += other.empty
+        self.errors.update(other.errors)
+
+    def report(self, label: str, elapsed: float) -> None:
+        """Print a summary line for these results."""
+        total = self.total
+        if total == 0:
+            _echo(f"{label}: no requests completed")
+            return
+        ordered = sorted(self.latencies)
+        _echo(
+            f"{label}: {total} requests, {total / elapsed:.1f} req/s, "
+            f"errors {sum(self.errors.values()) / total:.1%}, "
+            f"empty {self.empty / total:.1%}"
+        )
+        _echo(
+            "  latency ms: "
+            + ", ".join(
+                f"p{pct}={_percentile(ordered, pct) * 1000:.1f}" for pct in (50, 90, 99)
+            )
+            + f", max={ordered[-1] * 1000:.1f}"
+        )
+        for error, count in self.errors.most_common():
+            _echo(f"  {error}: {count}")
+
+
+async def _async_discover(args: argparse.Namespace) -> None:
+    """Listen for device broadcasts."""
+    devices = await async_sniff(args.iface, args.duration)
+    if not devices:
+        _echo("No Rinnai Fireplaces found")
+    for device in devices:
+        _echo(f"{device.ip}\t{device.id}\t{device.name}")
+
+
+async def _async_sweep(args: argparse.Namespace) -> None:
+    """Probe every address of the networks for devices."""
+    started = time.monotonic()
+    try:
+        devices = await sweep(
+            args.networks,
+            concurrency=args.concurrency,
+            limit=args.limit,
+            max_hosts=args.max_hosts,
+        )
+    except ValueError as exception:
+        _echo(f"Cannot sweep: {exception}")
+        return
+    for device in devices:
+        _echo(f"{device.ip}\t{device.name}")
+    _echo(f"Found {len(devices)} in {time.monotonic() - started:.1f} s")
+
+
+async def _async_info(args: argparse.Namespace) -> None:
+    """Print the name, version and status of a device."""
+    client = _client(args, args.host)
+    _echo(f"name: {await client.async_get_name()}")
+    _echo(f"version: {await client.async_get_version()}")
+    _echo(f"status: {await client.async_get_status()}")
+
+
+async def _async_watch(args: argparse.Namespace) -> None:
+    """Stream status changes of a device."""
+    client = _client(args, args.host)
+    async for status in client.watch(args.interval, only_changes=not args.all):
+        _echo(f"{time.strftime('%H:%M:%S')} {status}")
+
+
+async def _async_poll_host(  # noqa: PLR0913
+    host: str,
+    client: RinnaiFireplaceApiClient,
+    stats: ProbeStats,
+    semaphore: asyncio.Semaphore,
+    period: float,
+    deadline: float,
+) -> None:
+    """Request status from one host at a fixed rate until the deadline."""
+    next_at = time.monotonic()
+    while next_at < deadline:
+        await asyncio.sleep(max(0, next_at - time.monotonic()))
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                with tracing.span("cli.poll", track=host):
+                    status = await client.async_get_status()
+            except RinnaiFireplaceApiClientEmptyPayloadError:
+                stats.empty += 1
+            except Exception as exception:  # noqa: BLE001
+                stats.errors[type(exception).__name__] += 1
+            else:
+                if status is None:
+                    stats.errors["malformed payload"] += 1
+                else:
+                    stats.ok += 1
+            stats.latencies.append(time.monotonic() - started)
+        # never queue up missed ticks, a slow host just polls less often
+        next_at = max(next_at + period, time.monotonic())
+
+
+async def _async_poll(args: argparse.Namespace) -> None:
+    """Poll many hosts concurrently and report latency and errors."""
+    period = 1 / args.rate if args.rate > 0 else 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+    results = {host: ProbeStats() for host in args.hosts}
+    started = time.monotonic()
+    async with asyncio.TaskGroup() as group:
+        for host, stats in results.items():
+            group.create_task(
+                _async_poll_host(
+                    host,
+                    _client(args, host),
+                    stats,
+                    semaphore,
+                    period,
+                    started + args.duration,
+                )
+            )
+    elapsed = time.monotonic() - started
+
+    overall = ProbeStats()
+    for host, stats in results.items():
+        stats.report(host, elapsed)
+        overall.merge(stats)
+    if len(results) > 1:
+        overall.report("total", elapsed)
+
+
+async def _async_set(args: argparse.Namespace) -> None:
+    """Send setter commands to a device."""
+    client = _client(args, args.host)
+    commands = []
+    if args.state is not None:
+        state = OperationalState[args.state.upper()]
+        commands.append(("state", partial(client.async_set_op_state, state)))
+    if args.eco is not None:
+        eco = Eco[args.eco.upper()]
+        commands.append(("eco", partial(client.async_set_eco, eco)))
+    if args.temp is not None:
+        commands.append(("temp", partial(client.async_set_target_temp, args.temp)))
+    if args.flame is not None:
+        flame = args.flame
+        commands.append(("flame", partial(client.async_set_flame_level, flame)))
+    if not commands:
+        _echo("Nothing to set")
+    for index, (label, command) in enumerate(commands):
+        if index > 0:
+            # the device drops packets that arrive too quickly
+            await asyncio.sleep(args.delay)
+        started = time.monotonic()
+        await command()
+        _echo(f"{label}: ok in {(time.monotonic() - started) * 1000:.1f} ms")
+
+
+async def _async_simulate(args: argparse.Namespace) -> None:
+    """Run stand-in devices until interrupted."""
+    simulators = [
+        RinnaiFireplaceSimulator(
+            args.bind,
+            args.port + index,
+            name=f"Simulated {index}",
+            latency=args.latency,
+            empty_rate=args.empty_rate,
+        )
+        for index in range(args.count)
+    ]
+    for simulator in simulators:
+        await simulator.async_start()
+        _echo(f"{simulator.name} listening on {simulator.host}:{simulator.port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for simulator in simulators:
+            await simulator.async_stop()
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """Describe the command-line interface."""
+    parser = argparse.ArgumentParser(
+        prog="python -m custom_components.rinnai_fireplace",
+        description=__doc__,
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="debug logging")
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=RinnaiFireplaceApiClient.TIMEOUT_SECS,
+        help="seconds to wait for a device",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=RinnaiFireplaceApiClient.MAX_RETRIES,
+        help="retries after a timeout or empty payload",
+    )
+    parser.add_argument(
+        "--trace", type=Path, help="write a Chrome trace JSON timeline to this file"
+    )
+    commands = parser.add_subparsers(required=True)
+
+    discover = commands.add_parser("discover", help="listen for device broadcasts")
+    discover.add_argument("--iface", action="append", help="interface to sniff")
+    discover.add_argument("--duration", type=float, default=TIMEOUT_SEC)
+    discover.set_defaults(func=_async_discover)
+
+    sweeper = commands.add_parser("sweep", help="probe networks for devices")
+    sweeper.add_argument("networks", nargs="+", help="CIDR range, e.g. 10.0.4.0/22")
+    sweeper.add_argument("--concurrency", type=int, default=SWEEP_CONCURRENCY)
+    sweeper.add_argument("--limit", type=int, help="stop after this many devices")
+    sweeper.add_argument(
+        "--max-hosts",
+        type=int,
+        default=SWEEP_MAX_HOSTS,
+        help="refuse to sweep more addresses than this",
+    )
+    sweeper.set_defaults(func=_async_sweep)
+
+    info = commands.add_parser("info", help="show name, version and status")
+    info.add_argument("host", help="host[:port]")
+    info.set_defaults(func=_async_info)
+
+    watch = commands.add_parser("watch", help="stream status changes")
+    watch.add_argument("host", help="host[:port]")
+    watch.add_argument("--interval", type=float, default=1, help="seconds per sample")
+    watch.add_argument("--all", action="store_true", help="print unchanged samples")
+    watch.set_defaults(func=_async_watch)
+
+    poll = commands.add_parser("poll", help="poll hosts and report statistics")
+    poll.add_argument("hosts", nargs="+", help="host[:port]")
+    poll.add_argument(
+        "--rate", type=float, default=1, help="polls per second per host, 0 for max"
+    )
+    poll.add_argument("--duration", type=float, default=10, help="seconds to run")
+    poll.add_argument(
+        "--concurrency", type=int, default=32, help="requests in flight at once"
+    )
+    poll.set_defaults(func=_async_poll)
+
+    setter = commands.add_parser("set", help="send setter commands")
+    setter.add_argument("host", help="host[:port]")
+    setter.add_argument("--state", choices=["on", "standby"])
+    setter.add_argument("--eco", choices=["on", "off"])
+    setter.add_argument("--temp", type=int)
+    setter.add_argument("--flame", type=int)
+    setter.add_argument(
+        "--delay", type=float, default=1, help="seconds between commands"
+    )
+    setter.set_defaults(func=_async_set)
+
+    simulate = commands.add_parser("simulate", help="run stand-in devices")
+    simulate.add_argument("--bind", default="127.0.0.1")
+    simulate.add_argument("--port", type=int, default=RinnaiFireplaceApiClient.PORT)
+    simulate.add_argument("--count", type=int, default=1)
+    simulate.add_argument("--latency", type=float, default=0)
+    simulate.add_argument("--empty-rate", type=float, default=0)
+    simulate.set_defaults(func=_async_simulate)
+
+    return parser
+
+
+def main() -> None:
+    """Run the command-line interface."""
+    args = _build_parser().parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    if args.trace is not None:
+        tracing.start()
+    try:
+        with contextlib.suppress(KeyboardInterrupt):
+            asyncio.run(args.func(args))
+    finally:
+        if args.trace is not None:
+            args.trace.write_text(json.dumps(tracing.export()))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,21 @@
 from __future__ import annotations
 
 import asyncio
-from functools import wraps
+import contextlib
 import re
-from enum import Enum
-from typing import Any
+import time
+from enum import Enum, IntEnum
+from functools import cache
+from typing import TYPE_CHECKING, Any
 
 from attr import dataclass
 
+from . import tracing
 from .const import LOGGER
 
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Callable
+
 
 class RinnaiFireplaceApiClientError(Exception):
     """Exception to indicate a general API error."""
@@ -23,6 +29,12 @@ class RinnaiFireplaceApiClientTimeoutError(
     """Exception to indicate a timeout error."""
 
 
+class RinnaiFireplaceApiClientEmptyPayloadError(
+    RinnaiFireplaceApiClientTimeoutError,
+):
+    """Exception to indicate the device only answered with empty payloads."""
+
+
 class RinnaiFireplaceApiClientProtocolError(
     RinnaiFireplaceApiClientError,
 ):
@@ -107,118 +119,328 @@ class RinnaiFireplaceStatus:
     wifi_strength: int
 
 
+class RinnaiCommand(IntEnum):
+    """Identifier of a RINNAI protocol command."""
+
+    VERSION = 10
+    STATUS = 22
+    NAME = 27
+    FLAME_LEVEL = 32
+    TARGET_TEMP = 33
+    OP_STATE = 34
+    ECO = 35
+
+
+def _hex_byte(value: int) -> str:
+    """Encode an argument as a two digit hex byte."""
+    return f"{value:0>2X}"
+
+
+def _enum_value(value: Enum) -> str:
+    """Encode an enum argument as its wire value."""
+    return value.value
+
+
+STATUS_FIELDS: tuple[tuple[str, int, Callable[[int], Any]], ...] = (
+    ("main_power_switch", 1, int),
+    ("operation_state", 1, parse_operational_state),
+    ("error_code", 2, int),
+    ("operation_mode", 1, parse_operational_mode),
+    ("burning_state", 1, int),
+    ("flame_level", 1, int),
+    ("economy", 1, parse_eco),
+    ("lighting", 1, int),
+    ("room_temp", 1, int),
+    ("set_temp", 1, int),
+    ("burn_speed_info", 1, int),
+    ("lighting_info", 1, int),
+    ("timer_active", 1, int),
+    ("wifi_strength", 1, int),
+)
+"""Name, width in hex bytes and parser of each RINNAI_22 status field."""
+
+
+def _decode_status(fields: list[str]) -> RinnaiFireplaceStatus:
+    """Decode the fields of a RINNAI_22 response."""
+    values = {}
+    index = 0
+    for name, width, parse in STATUS_FIELDS:
+        values[name] = parse(int("".join(fields[index : index + width]), 16))
+        index += width
+    return RinnaiFireplaceStatus(**values)
+
+
+@dataclass(frozen=True)
+class CommandSpec:
+    """How a command is encoded and its response decoded."""
+
+    command: RinnaiCommand
+    encode_arg: Callable[[Any], str] | None = None
+    """Encoder of the single argument, None for commands without one."""
+    arg_type: Callable[[Any], Any] | None = None
+    """Type of the argument, also restores an argument from its stored value."""
+    response: re.Pattern[str] | None = None
+    """Pattern capturing the response fields, None when replies are not checked."""
+    decode: Callable[[list[str]], Any] | None = None
+
+
+COMMANDS: dict[RinnaiCommand, CommandSpec] = {
+    spec.command: spec
+    for spec in (
+        CommandSpec(
+            RinnaiCommand.VERSION,
+            response=re.compile(r"RINNAI_10,([^,]*)"),
+            decode=lambda fields: fields[0],
+        ),
+        CommandSpec(
+            RinnaiCommand.STATUS,
+            response=re.compile(r"RINNAI_22,(.*),E"),
+            decode=_decode_status,
+        ),
+        CommandSpec(
+            RinnaiCommand.NAME,
+            response=re.compile(r"RINNAI_27,([^,]*)"),
+            decode=lambda fields: fields[0],
+        ),
+        # the replies to setters are not documented, so they are not checked
+        CommandSpec(RinnaiCommand.FLAME_LEVEL, encode_arg=_hex_byte, arg_type=int),
+        CommandSpec(RinnaiCommand.TARGET_TEMP, encode_arg=_hex_byte, arg_type=int),
+        CommandSpec(
+            RinnaiCommand.OP_STATE,
+            encode_arg=_enum_value,
+            arg_type=OperationalState,
+        ),
+        CommandSpec(RinnaiCommand.ECO, encode_arg=_enum_value, arg_type=Eco),
+    )
+}
+
+_CONSTANT_FRAMES: dict[RinnaiCommand, bytes] = {
+    spec.command: f"RINNAI_{spec.command},E".encode("ascii")
+    for spec in COMMANDS.values()
+    if spec.encode_arg is None
+}
+
+
+@cache
+def encode_frame(command: RinnaiCommand, arg: Any = None) -> bytes:
+    """Encode a request frame, each distinct frame is only built once."""
+    spec = COMMANDS[command]
+    if spec.encode_arg is None:
+        return _CONSTANT_FRAMES[command]
+    return f"RINNAI_{command},{spec.encode_arg(arg)},E".encode("ascii")
+
+
+def decode_response(command: RinnaiCommand, payload: str) -> Any:
+    """
+    Decode the response to a command.
+
+    Raises RinnaiFireplaceApiClientProtocolError when the payload does not match
+    the response schema of the command.
+    """
+    spec = COMMANDS[command]
+    if spec.response is None:
+        return payload
+    result = spec.response.search(payload)
+    if result is None:
+        msg = f"Cannot parse {command.name.lower()} from payload: {payload}"
+        raise RinnaiFireplaceApiClientProtocolError(msg)
+    fields = result.group(1).split(",")
+    if spec.decode is None:
+        return fields
+    try:
+        return spec.decode(fields)
+    except ValueError as exception:
+        msg = f"Cannot decode {command.name.lower()} from payload: {payload}"
+        raise RinnaiFireplaceApiClientProtocolError(msg) from exception
+
+
 class RinnaiFireplaceApiClient:
     """RinnaiFireplace Api Client."""
 
     PORT = 3000
+    MAX_RETRIES = 3
+    TIMEOUT_SECS = 1
 
     def __init__(
         self,
         host: str,
+        port: int = PORT,
+        *,
+        timeout: float = TIMEOUT_SECS,
+        max_retries: int = MAX_RETRIES,
     ) -> None:
         """Initialize API Client."""
         self._host = host
+        self._port = port
+        self.timeout = timeout
+        """Seconds to wait for the device, can be changed on a running client."""
+        self.max_retries = max_retries
+        """Retries after a timeout or empty payload, can be changed while running."""
+
+    @property
+    def host(self) -> str:
+        """Return the host of the device."""
+        return self._host
 
     async def async_get_name(self) -> str:
         """Get data from the API."""
-        data = await self._api_wrapper(self._host, "RINNAI_27,E")
-        pattern = r"RINNAI_27,([^,]*)"
-        result = re.search(pattern, data)
-        if result is None:
-            msg = f"Cannot parse name from payload: {data}"
-            raise RinnaiFireplaceApiClientError(msg)
-        return result.group(1)
+        return await self.async_request(RinnaiCommand.NAME)
 
     async def async_get_version(self) -> str:
         """Get version from the API."""
-        data = await self._api_wrapper(self._host, "RINNAI_10,E")
-        pattern = r"RINNAI_10,([^,]*)"
-        result = re.search(pattern, data)
-        if result is None:
-            msg = f"Cannot parse version from payload: {data}"
-            raise RinnaiFireplaceApiClientError(msg)
-        return result.group(1)
+        return await self.async_request(RinnaiCommand.VERSION)
 
     async def async_set_eco(self, eco: Eco) -> None:
         """Set economy mode."""
-        await self._api_wrapper(self._host, f"RINNAI_35,{eco.value},E")
+        await self.async_request(RinnaiCommand.ECO, eco)
 
     async def async_set_op_state(self, state: OperationalState) -> None:
         """Set operational state."""
-        await self._api_wrapper(self._host, f"RINNAI_34,{state.value},E")
+        await self.async_request(RinnaiCommand.OP_STATE, state)
 
     async def async_set_target_temp(self, temp: int) -> None:
         """Set target temperature."""
-        await self._api_wrapper(self._host, f"RINNAI_33,{temp:0>2X},E")
+        await self.async_request(RinnaiCommand.TARGET_TEMP, temp)
 
     async def async_set_flame_level(self, flame_level: int) -> None:
         """Set flame level."""
-        await self._api_wrapper(self._host, f"RINNAI_32,{flame_level:0>2X},E")
+        await self.async_request(RinnaiCommand.FLAME_LEVEL, flame_level)
 
     async def async_get_status(self) -> RinnaiFireplaceStatus | None:
         """Get data from the API."""
-        data = await self._api_wrapper(self._host, "RINNAI_22,E")
-        pattern = r"RINNAI_22,(.*),E"
-        result = re.search(pattern, data)
-        if result is None:
+        try:
+            return await self.async_request(RinnaiCommand.STATUS)
+        except RinnaiFireplaceApiClientProtocolError:
             # Sometimes we get empty payloads :(
             return None
-        data = result.group(1).split(",")
-        main_power_switch = int(data[0], 16)
-        operation_state = parse_operational_state(int(data[1], 16))
-        error_code = int(f"{data[2]}{data[3]}", 16)
-        operation_mode = parse_operational_mode(int(data[4], 16))
-        burning_state = int(data[5], 16)
-        flame_level = int(data[6], 16)
-        economy = parse_eco(int(data[7], 16))
-        lighting = int(data[8], 16)
-        room_temp = int(data[9], 16)
-        set_temp = int(data[10], 16)
-        burn_speed_info = int(data[11], 16)
-        lighting_info = int(data[12], 16)
-        timer_active = int(data[13], 16)
-        wifi_strength = int(data[14], 16)
-        return RinnaiFireplaceStatus(
-            main_power_switch=main_power_switch,
-            operation_state=operation_state,
-            error_code=error_code,
-            operation_mode=operation_mode,
-            burning_state=burning_state,
-            flame_level=flame_level,
-            economy=economy,
-            lighting=lighting,
-            room_temp=room_temp,
-            set_temp=set_temp,
-            burn_speed_info=burn_speed_info,
-            lighting_info=lighting_info,
-            timer_active=timer_active,
-            wifi_strength=wifi_strength,
-        )
 
-    MAX_RETRIES = 3
-    TIMEOUT_SECS = 1
-
-    async def _api_wrapper(self, host: str, payload: str, attempt: int = 1) -> Any:
+    async def async_request(
+        self,
+        command: RinnaiCommand,
+        arg: Any = None,
+        *,
+        max_retries: int | None = None,
+    ) -> Any:
+        """
+        Send any command through the codec and decode its response.
+
+        max_retries overrides the retries of the client for this request.
+        """
+        data = await self._api_wrapper(
+            self._host,
+            encode_frame(command, arg),
+            max_retries=max_retries,
+        )
+        return decode_response(command, data)
+
+    async def watch(
+        self, interval: float, *, only_changes: bool = True
+    ) -> AsyncIterator[RinnaiFireplaceStatus]:
+        """
+        Stream the status of the device every interval seconds.
+
+        One connection is kept open and reused for every sample. Samples are only
+        taken when the consumer asks for the next one, so a slow consumer skips the
+        samples it missed instead of having them queued up.
+        """
+        connection = None
+        last = None
+        next_at = time.monotonic()
+        try:
+            while True:
+                await asyncio.sleep(max(0, next_at - time.monotonic()))
+                next_at = max(next_at + interval, time.monotonic())
+                connection, data = await self._async_watch_exchange(
+                    connection, encode_frame(RinnaiCommand.STATUS)
+                )
+                try:
+                    status = decode_response(RinnaiCommand.STATUS, data)
+                except RinnaiFireplaceApiClientProtocolError:
+                    continue
+                if only_changes and status == last:
+                    continue
+                last = status
+                yield status
+        finally:
+            if connection is not None:
+                await self._async_close(connection[1])
+
+    async def _async_watch_exchange(
+        self,
+        connection: tuple[asyncio.StreamReader, asyncio.StreamWriter] | None,
+        payload: bytes,
+    ) -> tuple[tuple[asyncio.StreamReader, asyncio.StreamWriter], str]:
+        """
+        Send a request over the open connection, reconnecting when it drops.
+
+        A reused connection the device has closed is replaced once without using
+        up a retry, only failures on a fresh connection count as retries.
+        """
+        failures = 0
+        while True:
+            reused = connection is not None
+            timed_out = False
+            try:
+                if connection is None:
+                    connection = await asyncio.wait_for(
+                        asyncio.open_connection(self._host, self._port),
+                        timeout=self.timeout,
+                    )
+                response = await asyncio.wait_for(
+                    self._async_exchange(*connection, payload),
+                    timeout=self.timeout,
+                )
+            except TimeoutError as exception:
+                LOGGER.debug("Watch request to %s timed out: %s", self._host, exception)
+                response = ""
+                timed_out = True
+            except OSError as exception:
+                LOGGER.debug("Watch connection to %s lost: %s", self._host, exception)
+                response = ""
+            if response != "":
+                return connection, response
+            # the device closed the connection or gave an empty payload
+            if connection is not None:
+                await self._async_close(connection[1])
+            connection = None
+            if reused and not timed_out:
+                continue
+            failures += 1
+            if failures > self.max_retries:
+                raise RinnaiFireplaceApiClientTimeoutError
+
+    async def _api_wrapper(
+        self,
+        host: str,
+        payload: bytes,
+        attempt: int = 1,
+        *,
+        max_retries: int | None = None,
+    ) -> Any:
         """Send request to the Device."""
+        if max_retries is None:
+            max_retries = self.max_retries
         try:
-            conn = asyncio.open_connection(host, self.PORT)
-            reader, writer = await asyncio.wait_for(conn, timeout=self.TIMEOUT_SECS)
-
-            LOGGER.debug("Sending: %s to %s", payload.encode("ascii"), host)
-            writer.write(payload.encode("ascii"))
-
-            data = await reader.read(1024)
-            LOGGER.debug("Received: %s", repr(data))
-
-            writer.close()
-            await writer.wait_closed()
-
-            response = data.decode()
+            with tracing.span(
+                "api.request", host=host, attempt=attempt, payload=payload
+            ):
+                with tracing.span("api.connect"):
+                    conn = asyncio.open_connection(host, self._port)
+                    reader, writer = await asyncio.wait_for(conn, timeout=self.timeout)
+
+                response = await self._async_exchange(reader, writer, payload)
+
+                with tracing.span("api.close"):
+                    writer.close()
+                    await writer.wait_closed()
         except TimeoutError as te:
             # try again up to 3 times
-            if attempt > self.MAX_RETRIES:
+            if attempt > max_retries:
                 raise RinnaiFireplaceApiClientTimeoutError from te
-            return await self._api_wrapper(host, payload, attempt + 1)
+            tracing.instant("api.retry", host=host, reason="timeout")
+            return await self._api_wrapper(
+                host, payload, attempt + 1, max_retries=max_retries
+            )
         except Exception as exception:
             msg = f"Error calling api - {exception}"
             raise RinnaiFireplaceApiClientError(
@@ -227,7 +449,30 @@ class RinnaiFireplaceApiClient:
         else:
             if response == "" or response is None:
                 # try again up to 3 times
-                if attempt > self.MAX_RETRIES:
-                    raise RinnaiFireplaceApiClientTimeoutError from None
-                return await self._api_wrapper(host, payload, attempt + 1)
+                if attempt > max_retries:
+                    raise RinnaiFireplaceApiClientEmptyPayloadError from None
+                tracing.instant("api.retry", host=host, reason="empty")
+                return await self._api_wrapper(
+                    host, payload, attempt + 1, max_retries=max_retries
+                )
             return response
+
+    async def _async_exchange(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, payload: bytes
+    ) -> str:
+        """Write one request and read its response."""
+        LOGGER.debug("Sending: %s to %s", payload, self._host)
+        with tracing.span("api.write"):
+            writer.write(payload)
+
+        with tracing.span("api.read"):
+            data = await reader.read(1024)
+        LOGGER.debug("Received: %s", repr(data))
+        return data.decode()
+
+    @staticmethod
+    async def _async_close(writer: asyncio.StreamWriter) -> None:
+        """Close a connection, ignoring errors from one that already dropped."""
+        writer.close()
+        with contextlib.suppress(OSError):
+            await writer.wait_closed()
@@ -17,11 +17,13 @@ from homeassistant.components.climate.const import (
 from homeassistant.const import ATTR_TEMPERATURE, UnitOfTemperature
 from homeassistant.exceptions import IntegrationError
 
-from .api import Eco, OperationalMode, OperationalState
+from . import tracing
+from .api import Eco, OperationalMode, OperationalState, RinnaiCommand
 from .const import (
     ATTR_DEVICE_ID,
     ATTR_DEVICE_IP,
     ATTR_DEVICE_NAME,
+    COMMAND_DELAY_SECS,
     CONF_ID,
     CONF_IP,
 )
@@ -31,6 +33,7 @@ if TYPE_CHECKING:
     from homeassistant.core import HomeAssistant
     from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
+    from .command_queue import RinnaiFireplaceCommandQueue
     from .coordinator import RinnaiFireplaceDataUpdateCoordinator
     from .data import RinnaiFireplaceConfigEntry
 
@@ -58,6 +61,11 @@ async def async_setup_entry(
     )
 
 
+def _trace_track(entity: RinnaiFireplaceClimate, *_: Any, **__: Any) -> str:
+    """Put the actions of an entity on the timeline of its fireplace."""
+    return entity.coordinator.config_entry.title
+
+
 class Presets(Enum):
     """The supported presets."""
 
@@ -100,6 +108,16 @@ class RinnaiFireplaceClimate(RinnaiFireplaceEntity, ClimateEntity):
     MAX_TEMP = 30
     MIN_TEMP = 16
 
+    @property
+    def _commands(self) -> RinnaiFireplaceCommandQueue:
+        """Return the queue setter commands go through."""
+        return self.coordinator.config_entry.runtime_data.commands
+
+    @property
+    def available(self) -> bool:
+        """Stay available for queueing commands while the device is offline."""
+        return super().available or self._commands.enabled
+
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return the extra attributes."""
@@ -155,6 +173,11 @@ class RinnaiFireplaceClimate(RinnaiFireplaceEntity, ClimateEntity):
             return None
         return str(self.coordinator.data.flame_level)
 
+    async def _async_pause(self) -> None:
+        """Wait between commands, the device answers with empty packets otherwise."""
+        with tracing.span("climate.pacing"):
+            await asyncio.sleep(COMMAND_DELAY_SECS)
+
     async def async_turn_off(self) -> None:
         """Turn off device."""
         await self.async_set_hvac_mode(HVACMode.OFF)
@@ -163,19 +186,20 @@ class RinnaiFireplaceClimate(RinnaiFireplaceEntity, ClimateEntity):
         """Turn on device."""
         await self.async_set_hvac_mode(HVACMode.HEAT)
 
+    @tracing.traced("climate.set_hvac_mode", track=_trace_track)
     async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
         """Set new target hvac mode."""
         match hvac_mode:
             case HVACMode.OFF:
-                await self.coordinator.config_entry.runtime_data.client.async_set_op_state(
-                    state=OperationalState.STANDBY
+                await self._commands.async_send(
+                    RinnaiCommand.OP_STATE, OperationalState.STANDBY
                 )
             case HVACMode.HEAT:
                 # we need to turn on
-                await self.coordinator.config_entry.runtime_data.client.async_set_op_state(
-                    state=OperationalState.ON
-                )
-                await asyncio.sleep(1)
+                if await self._commands.async_send(
+                    RinnaiCommand.OP_STATE, OperationalState.ON
+                ):
+                    await self._async_pause()
 
                 # then send the temperature to go to TEMP mode
                 temp = self.target_temperature
@@ -185,10 +209,10 @@ class RinnaiFireplaceClimate(RinnaiFireplaceEntity, ClimateEntity):
                 await self.async_set_temperature(**{ATTR_TEMPERATURE: temp})
             case HVACMode.FAN_ONLY:
                 # we need to turn on
-                await self.coordinator.config_entry.runtime_data.client.async_set_op_state(
-                    state=OperationalState.ON
-                )
-                await asyncio.sleep(1)
+                if await self._commands.async_send(
+                    RinnaiCommand.OP_STATE, OperationalState.ON
+                ):
+                    await self._async_pause()
                 # then send the fan level to go to FAN mode
                 fan_mode = self.fan_mode
                 if fan_mode is None:
@@ -198,10 +222,14 @@ class RinnaiFireplaceClimate(RinnaiFireplaceEntity, ClimateEntity):
             case _:
                 msg = f"Unsupported HVACMode: {hvac_mode}"
                 raise IntegrationError(msg)
+        if self._commands.pending:
+            # queued until the device is back, there is nothing to refresh yet
+            return
         # sleep for one second as otherwise we get empty packets
-        await asyncio.sleep(1)
+        await self._async_pause()
         await self.coordinator.async_refresh()
 
+    @tracing.traced("climate.set_fan_mode", track=_trace_track)
     async def async_set_fan_mode(self, fan_mode: str) -> None:
         """Set new target fan mode."""
         try:
@@ -213,13 +241,13 @@ class RinnaiFireplaceClimate(RinnaiFireplaceEntity, ClimateEntity):
             msg = f"Unsupported fan_mode: {fan_mode}"
             raise IntegrationError(msg)
 
-        await self.coordinator.config_entry.runtime_data.client.async_set_flame_level(
-            flame_level=fan_mode_int
-        )
+        if not await self._commands.async_send(RinnaiCommand.FLAME_LEVEL, fan_mode_int):
+            return
         # sleep for one second as otherwise we get empty packets
-        await asyncio.sleep(1)
+        await self._async_pause()
         await self.coordinator.async_refresh()
 
+    @tracing.traced("climate.set_temperature", track=_trace_track)
     async def async_set_temperature(self, **kwargs: Any) -> None:
         """Set new target temperature."""
         temperature = kwargs.get(ATTR_TEMPERATURE)
@@ -234,13 +262,15 @@ class RinnaiFireplaceClimate(RinnaiFireplaceEntity, ClimateEntity):
         if temperature_int < self.MIN_TEMP or temperature_int > self.MAX_TEMP:
             msg = f"Temperature: {temperature} outside of supported range"
             raise IntegrationError(msg)
-        await self.coordinator.config_entry.runtime_data.client.async_set_target_temp(
-            temp=temperature_int
-        )
+        if not await self._commands.async_send(
+            RinnaiCommand.TARGET_TEMP, temperature_int
+        ):
+            return
         # sleep for one second as otherwise we get empty packets
-        await asyncio.sleep(1)
+        await self._async_pause()
         await self.coordinator.async_refresh()
 
+    @tracing.traced("climate.set_preset_mode", track=_trace_track)
     async def async_set_preset_mode(self, preset_mode: str) -> None:
         """Set new preset mode."""
         try:
@@ -255,7 +285,8 @@ class RinnaiFireplaceClimate(RinnaiFireplaceEntity, ClimateEntity):
             case Presets.NORMAL:
                 eco = Eco.OFF
 
-        await self.coordinator.config_entry.runtime_data.client.async_set_eco(eco=eco)
+        if not await self._commands.async_send(RinnaiCommand.ECO, eco):
+            return
         # sleep for one second as otherwise we get empty packets
-        await asyncio.sleep(1)
+        await self._async_pause()
         await self.coordinator.async_refresh()
@@ -0,0 +1,235 @@
+"""Offline command queue for rinnai_fireplace."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from enum import Enum
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
+
+from . import tracing
+from .api import (
+    COMMANDS,
+    OperationalState,
+    RinnaiCommand,
+    RinnaiFireplaceApiClientError,
+    RinnaiFireplaceApiClientProtocolError,
+)
+from .const import (
+    COMMAND_DELAY_SECS,
+    CONF_QUEUE_OFFLINE,
+    CONF_QUEUE_TTL,
+    DEFAULT_QUEUE_TTL_SECS,
+    DOMAIN,
+    EVENT_COMMANDS_REPLAYED,
+    LOGGER,
+)
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+    from .data import RinnaiFireplaceConfigEntry
+
+STORAGE_VERSION = 1
+
+# turn on before setting the mode, the device ignores modes in standby
+REPLAY_ORDER = (
+    RinnaiCommand.ECO,
+    RinnaiCommand.OP_STATE,
+    RinnaiCommand.TARGET_TEMP,
+    RinnaiCommand.FLAME_LEVEL,
+)
+"""The setter commands that can be queued, in the order they are replayed."""
+
+
+def command_key(command: RinnaiCommand) -> str:
+    """Return the name a command is stored and reported under."""
+    return command.name.lower()
+
+
+def storage_key(entry_id: str) -> str:
+    """Return the storage key of the queue of an entry."""
+    return f"{DOMAIN}.{entry_id}.commands"
+
+
+class RinnaiFireplaceCommandQueue:
+    """
+    Holds setter commands for a device that cannot be reached.
+
+    Queued commands are collapsed to the final desired state, persisted, and
+    replayed in a safe order once the coordinator reaches the device again. While
+    anything is queued new commands are queued behind it so they are not reordered.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: RinnaiFireplaceConfigEntry) -> None:
+        """Initialize the queue."""
+        self._hass = hass
+        self._entry = entry
+        self._store: Store[dict[str, dict[str, Any]]] = Store(
+            hass, STORAGE_VERSION, storage_key(entry.entry_id)
+        )
+        self._pending: dict[RinnaiCommand, dict[str, Any]] = {}
+        self._replay_task: asyncio.Task[bool] | None = None
+
+    @property
+    def title(self) -> str:
+        """Return the title of the entry the queue belongs to."""
+        return self._entry.title
+
+    @property
+    def enabled(self) -> bool:
+        """Return whether commands are queued while the device is unreachable."""
+        return self._entry.options.get(CONF_QUEUE_OFFLINE, False)
+
+    @property
+    def pending(self) -> dict[str, Any]:
+        """Return the queued commands and their values."""
+        return {
+            command_key(command): item["value"]
+            for command, item in self._pending.items()
+        }
+
+    async def async_load(self) -> None:
+        """Restore commands queued before a restart."""
+        stored = await self._store.async_load() or {}
+        # unknown commands could never be replayed and would stay queued forever
+        keys = {command_key(command): command for command in REPLAY_ORDER}
+        self._pending = {keys[key]: item for key, item in stored.items() if key in keys}
+
+    async def async_send(self, command: RinnaiCommand, value: Any) -> bool:
+        """Send a command, returning False when it was queued instead."""
+        coordinator = self._entry.runtime_data.coordinator
+        if self.enabled and (self._pending or not coordinator.last_update_success):
+            await self._async_enqueue(command, value)
+            return False
+        try:
+            # the queue is the retry, so an unreachable device does not hold the
+            # caller through every retry first
+            await self._async_call(
+                command, value, max_retries=0 if self.enabled else None
+            )
+        except RinnaiFireplaceApiClientProtocolError:
+            # the device answered, queueing would not change its mind
+            raise
+        except RinnaiFireplaceApiClientError:
+            if not self.enabled:
+                raise
+            await self._async_enqueue(command, value)
+            return False
+        return True
+
+    @callback
+    def async_handle_update(self) -> None:
+        """Replay the queue once the coordinator reaches the device again."""
+        coordinator = self._entry.runtime_data.coordinator
+        if (
+            not self._pending
+            or not coordinator.last_update_success
+            or (self._replay_task is not None and not self._replay_task.done())
+        ):
+            return
+        self._replay_task = self._entry.async_create_background_task(
+            self._hass, self._async_replay(), f"{DOMAIN}_replay_commands"
+        )
+        self._replay_task.add_done_callback(self._async_replay_done)
+
+    @callback
+    def _async_replay_done(self, task: asyncio.Task[bool]) -> None:
+        """Replay what was queued while a successful replay was finishing."""
+        if not task.cancelled() and task.exception() is None and task.result():
+            self.async_handle_update()
+
+    async def _async_enqueue(self, command: RinnaiCommand, value: Any) -> None:
+        """Add a command, dropping the ones it supersedes."""
+        match command:
+            case RinnaiCommand.TARGET_TEMP:
+                self._pending.pop(RinnaiCommand.FLAME_LEVEL, None)
+            case RinnaiCommand.FLAME_LEVEL:
+                self._pending.pop(RinnaiCommand.TARGET_TEMP, None)
+            case RinnaiCommand.OP_STATE if OperationalState(
+                value
+            ) == OperationalState.STANDBY:
+                self._pending.pop(RinnaiCommand.TARGET_TEMP, None)
+                self._pending.pop(RinnaiCommand.FLAME_LEVEL, None)
+        ttl = self._entry.options.get(CONF_QUEUE_TTL, DEFAULT_QUEUE_TTL_SECS)
+        self._pending[command] = {
+            "value": value.value if isinstance(value, Enum) else value,
+            "expires": time.time() + ttl,
+        }
+        LOGGER.debug("Queued %s=%s for %s", command.name, value, self._entry.title)
+        await self._async_save()
+
+    async def _async_save(self) -> None:
+        """Persist the queue."""
+        await self._store.async_save(
+            {command_key(command): item for command, item in self._pending.items()}
+        )
+
+    async def _async_call(
+        self, command: RinnaiCommand, value: Any, max_retries: int | None = None
+    ) -> None:
+        """Send one command to the device, restoring its argument if stored."""
+        arg_type = COMMANDS[command].arg_type
+        await self._entry.runtime_data.client.async_request(
+            command,
+            value if arg_type is None else arg_type(value),
+            max_retries=max_retries,
+        )
+
+    @tracing.traced("command_queue.replay", track=lambda queue: queue.title)
+    async def _async_replay(self) -> bool:
+        """Send the collapsed queue and report the outcome through an event."""
+        now = time.time()
+        expired = [
+            command for command, item in self._pending.items() if item["expires"] < now
+        ]
+        for command in expired:
+            del self._pending[command]
+
+        sent: dict[str, Any] = {}
+        error = None
+        try:
+            # commands queued while replaying are sent by another pass
+            while any(command in self._pending for command in REPLAY_ORDER):
+                for command in REPLAY_ORDER:
+                    item = self._pending.get(command)
+                    if item is None:
+                        continue
+                    if sent:
+                        # sleep for one second as otherwise we get empty packets
+                        with tracing.span("command_queue.pacing"):
+                            await asyncio.sleep(COMMAND_DELAY_SECS)
+                    await self._async_call(command, item["value"])
+                    sent[command_key(command)] = item["value"]
+                    # keep a newer value queued while this one was being sent
+                    if self._pending.get(command) is item:
+                        del self._pending[command]
+        except RinnaiFireplaceApiClientError as exception:
+            error = str(exception) or type(exception).__name__
+            LOGGER.warning(
+                "Replaying commands to %s failed: %s", self._entry.title, error
+            )
+        finally:
+            await self._async_save()
+
+        if sent or expired or error:
+            self._hass.bus.async_fire(
+                EVENT_COMMANDS_REPLAYED,
+                {
+                    "entry_id": self._entry.entry_id,
+                    "name": self._entry.title,
+                    "success": error is None,
+                    "error": error,
+                    "sent": sent,
+                    "expired": [command_key(command) for command in expired],
+                    "remaining": self.pending,
+                },
+            )
+        if sent:
+            with tracing.span("command_queue.pacing"):
+                await asyncio.sleep(COMMAND_DELAY_SECS)
+            await self._entry.runtime_data.coordinator.async_request_refresh()
+        return error is None
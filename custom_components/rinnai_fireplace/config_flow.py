@@ -4,12 +4,28 @@ from __future__ import annotations
 
 import voluptuous as vol
 from homeassistant import config_entries, data_entry_flow
+from homeassistant.core import callback
 
 from .api import (
     RinnaiFireplaceApiClient,
 )
-from .const import CONF_DEVICE_NAME, CONF_ID, CONF_IP, CORE_DEVICE_NAME, DOMAIN
-from .discovery import FoundDevice, discover
+from .const import (
+    CONF_DEVICE_NAME,
+    CONF_ID,
+    CONF_IP,
+    CONF_MAX_RETRIES,
+    CONF_POLL_INTERVAL,
+    CONF_QUEUE_OFFLINE,
+    CONF_QUEUE_TTL,
+    CONF_TIMEOUT,
+    CORE_DEVICE_NAME,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_POLL_INTERVAL_SECS,
+    DEFAULT_QUEUE_TTL_SECS,
+    DEFAULT_TIMEOUT_SECS,
+    DOMAIN,
+)
+from .discovery import FoundDevice, async_get_local_networks, discover, sweep
 
 
 class RinnaiFireplaceFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
@@ -17,6 +33,14 @@ class RinnaiFireplaceFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> RinnaiFireplaceOptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return RinnaiFireplaceOptionsFlowHandler(config_entry)
+
     async def async_step_user(
         self,
         user_input: dict | None = None,
@@ -26,12 +50,18 @@ class RinnaiFireplaceFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         if user_input is not None:
             if user_input["configure_type"] == "Discovery":
                 return await self.async_step_discovery()
+            if user_input["configure_type"] == "Sweep":
+                return await self.async_step_sweep()
             return await self.async_step_manual()
 
         return self.async_show_form(
             step_id="user",
             data_schema=vol.Schema(
-                {vol.Required("configure_type"): vol.In(["Discovery", "Manual"])}
+                {
+                    vol.Required("configure_type"): vol.In(
+                        ["Discovery", "Sweep", "Manual"]
+                    )
+                }
             ),
             errors=_errors,
         )
@@ -61,6 +91,29 @@ class RinnaiFireplaceFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             return self.async_abort(reason="discovery_failed")
         return await self.async_step_discovery(user_input=devices)
 
+    async def async_step_sweep(
+        self, user_input: dict | None = None
+    ) -> data_entry_flow.FlowResult:
+        """Probe whole networks for devices whose broadcasts do not reach us."""
+        errors = {}
+        if user_input is not None:
+            networks = [net for net in user_input["networks"].split(",") if net.strip()]
+            try:
+                devices = await sweep(networks)
+            except ValueError:
+                errors["networks"] = "invalid_network"
+            else:
+                return await self.async_step_discovery(user_input=devices)
+            default = user_input["networks"]
+        else:
+            default = ", ".join(await async_get_local_networks(self.hass))
+
+        return self.async_show_form(
+            step_id="sweep",
+            data_schema=vol.Schema({vol.Required("networks", default=default): str}),
+            errors=errors,
+        )
+
     async def async_step_manual(self, user_input=None):
         """Manual Discovery."""
         if user_input is None:
@@ -112,3 +165,50 @@ class RinnaiFireplaceFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                 CONF_DEVICE_NAME: device.name,
             },
         )
+
+
+class RinnaiFireplaceOptionsFlowHandler(config_entries.OptionsFlow):
+    """Options flow for tuning how RinnaiFireplace talks to the device."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(
+        self,
+        user_input: dict | None = None,
+    ) -> data_entry_flow.FlowResult:
+        """Manage the polling, connection and offline queue options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_POLL_INTERVAL,
+                        default=options.get(
+                            CONF_POLL_INTERVAL, DEFAULT_POLL_INTERVAL_SECS
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=3600)),
+                    vol.Required(
+                        CONF_TIMEOUT,
+                        default=options.get(CONF_TIMEOUT, DEFAULT_TIMEOUT_SECS),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=30)),
+                    vol.Required(
+                        CONF_MAX_RETRIES,
+                        default=options.get(CONF_MAX_RETRIES, DEFAULT_MAX_RETRIES),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=10)),
+                    vol.Required(
+                        CONF_QUEUE_OFFLINE,
+                        default=options.get(CONF_QUEUE_OFFLINE, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_QUEUE_TTL,
+                        default=options.get(CONF_QUEUE_TTL, DEFAULT_QUEUE_TTL_SECS),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=86400)),
+                }
+            ),
+        )
@@ -13,3 +13,30 @@ ATTR_DEVICE_NAME = "device_name"
 ATTR_DEVICE_ID = "device_id"
 ATTR_DEVICE_IP = "device_ip"
 MANUFACTURER = "Rinnai"
+
+CONF_POLL_INTERVAL = "poll_interval"
+CONF_TIMEOUT = "timeout"
+CONF_MAX_RETRIES = "max_retries"
+DEFAULT_POLL_INTERVAL_SECS = 15
+DEFAULT_TIMEOUT_SECS = 1
+DEFAULT_MAX_RETRIES = 3
+CONF_QUEUE_OFFLINE = "queue_offline"
+CONF_QUEUE_TTL = "queue_ttl"
+DEFAULT_QUEUE_TTL_SECS = 300
+EVENT_COMMANDS_REPLAYED = f"{DOMAIN}_commands_replayed"
+
+COMMAND_DELAY_SECS = 1
+"""Pause between commands, the device answers with empty packets otherwise."""
+
+SERVICE_SET_GROUP_STATE = "set_group_state"
+ATTR_MAX_PARALLEL = "max_parallel"
+ATTR_DEADLINE = "deadline"
+DEFAULT_MAX_PARALLEL = 10
+DEFAULT_DEADLINE_SECS = 30
+
+SERVICE_START_TRACE = "start_trace"
+SERVICE_STOP_TRACE = "stop_trace"
+SERVICE_DUMP_TRACE = "dump_trace"
+ATTR_MAX_EVENTS = "max_events"
+ATTR_FILENAME = "filename"
+DEFAULT_TRACE_FILENAME = f"{DOMAIN}_trace.json"
@@ -7,11 +7,21 @@ from typing import TYPE_CHECKING, Any
 
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
+from . import tracing
 from .api import (
     RinnaiFireplaceApiClientError,
     RinnaiFireplaceStatus,
 )
-from .const import DOMAIN, LOGGER
+from .const import (
+    CONF_MAX_RETRIES,
+    CONF_POLL_INTERVAL,
+    CONF_TIMEOUT,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_POLL_INTERVAL_SECS,
+    DEFAULT_TIMEOUT_SECS,
+    DOMAIN,
+    LOGGER,
+)
 
 if TYPE_CHECKING:
     from homeassistant.core import HomeAssistant
@@ -37,22 +47,39 @@ class RinnaiFireplaceDataUpdateCoordinator(
             hass=hass,
             logger=LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(seconds=15),
+            update_interval=timedelta(
+                seconds=config_entry.options.get(
+                    CONF_POLL_INTERVAL, DEFAULT_POLL_INTERVAL_SECS
+                )
+            ),
         )
         self.device_name = None
         self.sw_version = None
 
+    async def async_apply_options(self) -> None:
+        """Apply the tuning options of the entry to the running client and poller."""
+        options = self.config_entry.options
+        client = self.config_entry.runtime_data.client
+        client.timeout = options.get(CONF_TIMEOUT, DEFAULT_TIMEOUT_SECS)
+        client.max_retries = options.get(CONF_MAX_RETRIES, DEFAULT_MAX_RETRIES)
+        self.update_interval = timedelta(
+            seconds=options.get(CONF_POLL_INTERVAL, DEFAULT_POLL_INTERVAL_SECS)
+        )
+        # refreshing reschedules the next poll with the new interval
+        await self.async_request_refresh()
+
     async def _async_setup(self) -> None:
         """Do initialization logic."""
-        self.device_name = await self.config_entry.runtime_data.client.async_get_name()
-        self.sw_version = (
-            await self.config_entry.runtime_data.client.async_get_version()
-        )
+        with tracing.span("coordinator.setup", track=self.config_entry.title):
+            client = self.config_entry.runtime_data.client
+            self.device_name = await client.async_get_name()
+            self.sw_version = await client.async_get_version()
 
     async def _async_update_data(self) -> Any:
         """Update data via library."""
         try:
-            status = await self.config_entry.runtime_data.client.async_get_status()
+            with tracing.span("coordinator.update", track=self.config_entry.title):
+                status = await self.config_entry.runtime_data.client.async_get_status()
         except RinnaiFireplaceApiClientError as exception:
             raise UpdateFailed(exception) from exception
         else:
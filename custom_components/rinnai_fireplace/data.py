@@ -10,6 +10,7 @@ if TYPE_CHECKING:
     from homeassistant.loader import Integration
 
     from .api import RinnaiFireplaceApiClient
+    from .command_queue import RinnaiFireplaceCommandQueue
     from .coordinator import RinnaiFireplaceDataUpdateCoordinator
 
 
@@ -23,3 +24,4 @@ class RinnaiFireplaceData:
     client: RinnaiFireplaceApiClient
     coordinator: RinnaiFireplaceDataUpdateCoordinator
     integration: Integration
+    commands: RinnaiFireplaceCommandQueue
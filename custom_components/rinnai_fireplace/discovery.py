@@ -5,6 +5,8 @@ from __future__ import annotations
 import asyncio
 import re
 import time
+from ipaddress import IPv4Network, ip_network
+from itertools import chain
 from typing import TYPE_CHECKING, Optional
 
 from attr import dataclass
@@ -12,10 +14,21 @@ from homeassistant.components import network
 from scapy.all import AsyncSniffer, Packet
 from scapy.layers.inet import IP, UDP
 
+from . import tracing
+from .api import RinnaiFireplaceApiClient, RinnaiFireplaceApiClientError
+
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from homeassistant.core import HomeAssistant
 TIMEOUT_SEC = 10
 BROADCAST_PORT = 3500
+SWEEP_CONCURRENCY = 256
+SWEEP_TIMEOUT_SEC = 1.0
+# Wi-Fi devices in power save can take a few hundred ms to accept a connection
+SWEEP_MIN_TIMEOUT_SEC = 0.5
+SWEEP_MAX_HOSTS = 1024
+"""Largest number of addresses swept at once, a /22."""
 
 
 @dataclass
@@ -37,13 +50,21 @@ async def discover(hass: HomeAssistant) -> list[FoundDevice]:
     if len(ifaces) == 0:
         return []
 
+    with tracing.span("discovery.sniff", track="discovery", interfaces=len(ifaces)):
+        return await async_sniff(ifaces)
+
+
+async def async_sniff(
+    ifaces: list[str] | None = None, duration: float = TIMEOUT_SEC
+) -> list[FoundDevice]:
+    """Listen for Rinnai Fireplace broadcasts on the given interfaces."""
     devices = []
     # Record the start time
     start_time = time.time()
 
-    # This function will return True when TIMEOUT_SEC seconds have elapsed
+    # This function will return True when duration seconds have elapsed
     def stop_filter(_: Packet) -> bool:
-        return time.time() - start_time > TIMEOUT_SEC
+        return time.time() - start_time > duration
 
     def process_packet(packet: Packet) -> FoundDevice | None:
         if UDP not in packet or packet[UDP].dport != BROADCAST_PORT:
@@ -70,3 +91,115 @@ async def discover(hass: HomeAssistant) -> list[FoundDevice]:
     loop = asyncio.get_event_loop()
     await loop.run_in_executor(None, sniffer.join)
     return devices
+
+
+async def async_get_local_networks(hass: HomeAssistant) -> list[str]:
+    """
+    Return the IPv4 networks of the enabled adapters, for sweeping.
+
+    Networks larger than SWEEP_MAX_HOSTS are narrowed to the block of that size
+    around the adapter address. Networks of the default adapter come first and
+    the rest are only added while they fit in SWEEP_MAX_HOSTS together.
+    """
+    adapters = await network.async_get_adapters(hass)
+    min_prefix = 32 - (SWEEP_MAX_HOSTS - 1).bit_length()
+    networks: list[IPv4Network] = []
+    for adapt in sorted(adapters, key=lambda adapt: not adapt["default"]):
+        if adapt["enabled"] is not True:
+            continue
+        for ipv4 in adapt["ipv4"]:
+            net = ip_network(
+                f"{ipv4['address']}/{max(ipv4['network_prefix'], min_prefix)}",
+                strict=False,
+            )
+            total = sum(known.num_addresses for known in networks)
+            if net not in networks and total + net.num_addresses <= SWEEP_MAX_HOSTS:
+                networks.append(net)
+    return [str(net) for net in networks]
+
+
+def _parse_networks(networks: Iterable[str], max_hosts: int) -> list[IPv4Network]:
+    """Parse CIDR ranges, raising ValueError for IPv6 or too many addresses."""
+    parsed = [ip_network(net.strip(), strict=False) for net in networks]
+    for net in parsed:
+        if not isinstance(net, IPv4Network):
+            msg = f"{net} is not an IPv4 network"
+            raise ValueError(msg)  # noqa: TRY004 callers handle ValueError
+    if sum(net.num_addresses for net in parsed) > max_hosts:
+        msg = f"Cannot sweep more than {max_hosts} addresses at once"
+        raise ValueError(msg)
+    return parsed
+
+
+class _SweepDoneError(Exception):
+    """Raised by a sweep worker once enough devices were found."""
+
+
+async def sweep(
+    networks: Iterable[str],
+    *,
+    concurrency: int = SWEEP_CONCURRENCY,
+    limit: int | None = None,
+    max_hosts: int = SWEEP_MAX_HOSTS,
+) -> list[FoundDevice]:
+    """
+    Actively probe every address of the networks for Rinnai Fireplaces.
+
+    For networks where the device broadcasts do not reach us. Each address gets a
+    RINNAI_27 name request on the device port. The connect timeout starts at
+    SWEEP_TIMEOUT_SEC and shrinks to a few times the slowest answer seen so far, so
+    the silent addresses that make up most of a sweep are given up on quickly.
+    Remaining probes are cancelled once limit devices have been found.
+
+    Raises ValueError for ranges that are not IPv4 or that add up to more than
+    max_hosts addresses, before anything is probed.
+    """
+    hosts = chain.from_iterable(
+        net.hosts() for net in _parse_networks(networks, max_hosts)
+    )
+    devices: list[FoundDevice] = []
+    slowest = 0.0
+
+    async def probe(host: str) -> None:
+        nonlocal slowest
+        timeout = SWEEP_TIMEOUT_SEC
+        if slowest > 0:
+            timeout = min(SWEEP_TIMEOUT_SEC, max(SWEEP_MIN_TIMEOUT_SEC, 3 * slowest))
+        client = RinnaiFireplaceApiClient(host, timeout=timeout, max_retries=0)
+        started = time.monotonic()
+        try:
+            # the read is not covered by the client timeout
+            name = await asyncio.wait_for(
+                client.async_get_name(), timeout + SWEEP_TIMEOUT_SEC
+            )
+        except TimeoutError:
+            return
+        except RinnaiFireplaceApiClientError as exception:
+            if isinstance(exception.__cause__, ConnectionRefusedError):
+                # a refusal still tells us how far away the network is
+                slowest = max(slowest, time.monotonic() - started)
+            return
+        slowest = max(slowest, time.monotonic() - started)
+        # probes still in flight may answer after the limit was reached
+        if limit is None or len(devices) < limit:
+            devices.append(FoundDevice(None, name, host))
+
+    async def worker(index: int) -> None:
+        # hosts is shared, each address is taken by exactly one worker
+        with tracing.span("discovery.worker", track=f"sweep worker {index}"):
+            for host in hosts:
+                await probe(str(host))
+                if limit is not None and len(devices) >= limit:
+                    raise _SweepDoneError
+
+    workers = [asyncio.create_task(worker(index)) for index in range(concurrency)]
+    with tracing.span("discovery.sweep", track="discovery", concurrency=concurrency):
+        try:
+            await asyncio.gather(*workers)
+        except _SweepDoneError:
+            pass
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+    return devices
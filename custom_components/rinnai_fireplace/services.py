@@ -0,0 +1,287 @@
+"""Services for rinnai_fireplace."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import voluptuous as vol
+from homeassistant.components.climate import (
+    ATTR_FAN_MODE,
+    ATTR_HVAC_MODE,
+    ATTR_PRESET_MODE,
+    HVACMode,
+)
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import ATTR_ENTITY_ID, ATTR_TEMPERATURE
+from homeassistant.core import SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import entity_registry as er
+
+from . import tracing
+from .api import Eco, OperationalState, RinnaiCommand
+from .climate import Presets, RinnaiFireplaceClimate
+from .const import (
+    ATTR_DEADLINE,
+    ATTR_FILENAME,
+    ATTR_MAX_EVENTS,
+    ATTR_MAX_PARALLEL,
+    COMMAND_DELAY_SECS,
+    DEFAULT_DEADLINE_SECS,
+    DEFAULT_MAX_PARALLEL,
+    DEFAULT_TRACE_FILENAME,
+    DOMAIN,
+    LOGGER,
+    SERVICE_DUMP_TRACE,
+    SERVICE_SET_GROUP_STATE,
+    SERVICE_START_TRACE,
+    SERVICE_STOP_TRACE,
+)
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse
+
+    from .data import RinnaiFireplaceConfigEntry
+
+SET_GROUP_STATE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+        vol.Required(ATTR_HVAC_MODE): vol.In(
+            [HVACMode.OFF, HVACMode.HEAT, HVACMode.FAN_ONLY]
+        ),
+        vol.Optional(ATTR_TEMPERATURE): vol.All(
+            vol.Coerce(int),
+            vol.Range(
+                min=RinnaiFireplaceClimate.MIN_TEMP, max=RinnaiFireplaceClimate.MAX_TEMP
+            ),
+        ),
+        vol.Optional(ATTR_FAN_MODE): vol.All(
+            vol.Coerce(int),
+            vol.Range(
+                min=RinnaiFireplaceClimate.MIN_FAN_MODE,
+                max=RinnaiFireplaceClimate.MAX_FAN_MODE,
+            ),
+        ),
+        vol.Optional(ATTR_PRESET_MODE): vol.In(Presets._member_names_),
+        vol.Optional(ATTR_MAX_PARALLEL, default=DEFAULT_MAX_PARALLEL): vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        ),
+        vol.Optional(ATTR_DEADLINE, default=DEFAULT_DEADLINE_SECS): vol.All(
+            vol.Coerce(float), vol.Range(min=0, min_included=False)
+        ),
+    }
+)
+
+START_TRACE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_MAX_EVENTS, default=tracing.MAX_EVENTS): vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        ),
+    }
+)
+
+DUMP_TRACE_SCHEMA = vol.Schema(
+    {
+        # a bare file name, the trace is always written to the config directory
+        vol.Optional(ATTR_FILENAME, default=DEFAULT_TRACE_FILENAME): vol.Match(
+            r"^[\w.-]+\.json$"
+        ),
+    }
+)
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services."""
+
+    async def async_set_group_state(call: ServiceCall) -> ServiceResponse:
+        """Apply one target state to many fireplaces at once."""
+        entries = _target_entries(hass, call.data.get(ATTR_ENTITY_ID))
+        with tracing.span(
+            "services.set_group_state",
+            track=SERVICE_SET_GROUP_STATE,
+            entries=len(entries),
+        ):
+            results = await _async_fan_out(
+                entries,
+                call.data,
+                call.data[ATTR_MAX_PARALLEL],
+                call.data[ATTR_DEADLINE],
+            )
+        if not call.return_response:
+            return None
+        return {
+            "succeeded": sum(result["success"] for result in results),
+            "failed": sum(not result["success"] for result in results),
+            "results": results,
+        }
+
+    async def async_start_trace(call: ServiceCall) -> None:
+        """Start recording spans into a new ring."""
+        tracing.start(call.data[ATTR_MAX_EVENTS])
+
+    async def async_stop_trace(_: ServiceCall) -> None:
+        """Stop recording spans."""
+        tracing.stop()
+
+    async def async_dump_trace(call: ServiceCall) -> ServiceResponse:
+        """Write the latest trace as Chrome/Perfetto trace JSON."""
+        trace = tracing.export()
+        if trace is None:
+            msg = f"No trace recorded, call {DOMAIN}.{SERVICE_START_TRACE} first"
+            raise ServiceValidationError(msg)
+        path = hass.config.path(call.data[ATTR_FILENAME])
+        await hass.async_add_executor_job(_write_json, path, trace)
+        if not call.return_response:
+            return None
+        return {"path": path, "events": tracing.events()}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_GROUP_STATE,
+        async_set_group_state,
+        schema=SET_GROUP_STATE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_START_TRACE, async_start_trace, schema=START_TRACE_SCHEMA
+    )
+    hass.services.async_register(DOMAIN, SERVICE_STOP_TRACE, async_stop_trace)
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DUMP_TRACE,
+        async_dump_trace,
+        schema=DUMP_TRACE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def _write_json(path: str, data: dict[str, Any]) -> None:
+    """Write data to a JSON file."""
+    with Path(path).open("w") as file:
+        json.dump(data, file)
+
+
+def _target_entries(
+    hass: HomeAssistant, entity_ids: list[str] | None
+) -> list[RinnaiFireplaceConfigEntry]:
+    """Resolve the targeted entities to their loaded config entries."""
+    loaded = {
+        entry.entry_id: entry
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.state is ConfigEntryState.LOADED
+    }
+    if entity_ids is None:
+        return list(loaded.values())
+
+    registry = er.async_get(hass)
+    entries = {}
+    for entity_id in entity_ids:
+        entity = registry.async_get(entity_id)
+        if entity is None or entity.config_entry_id not in loaded:
+            msg = f"{entity_id} is not a loaded Rinnai Fireplace"
+            raise ServiceValidationError(msg)
+        entries[entity.config_entry_id] = loaded[entity.config_entry_id]
+    return list(entries.values())
+
+
+async def _async_fan_out(
+    entries: list[RinnaiFireplaceConfigEntry],
+    target: dict[str, Any],
+    max_parallel: int,
+    deadline: float,
+) -> list[dict[str, Any]]:
+    """Apply the target to every entry with bounded parallelism."""
+    semaphore = asyncio.Semaphore(max_parallel)
+    started: dict[str, float] = {}
+    finished: dict[str, float] = {}
+
+    async def _async_apply_bounded(entry: RinnaiFireplaceConfigEntry) -> bool:
+        async with semaphore:
+            # waiting for a free slot does not count towards the latency
+            started[entry.entry_id] = time.monotonic()
+            try:
+                with tracing.span("services.apply", track=entry.title):
+                    return await _async_apply(entry, target)
+            finally:
+                finished[entry.entry_id] = time.monotonic()
+
+    tasks = {
+        entry.entry_id: asyncio.create_task(_async_apply_bounded(entry))
+        for entry in entries
+    }
+    if tasks:
+        _, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    results = []
+    for entry in entries:
+        task = tasks[entry.entry_id]
+        error = None
+        if task.cancelled():
+            error = "Deadline exceeded"
+        elif task.exception() is not None:
+            error = str(task.exception()) or type(task.exception()).__name__
+            LOGGER.warning("Failed to set state of %s: %s", entry.title, error)
+        results.append(
+            {
+                "entry_id": entry.entry_id,
+                "name": entry.title,
+                "success": error is None,
+                "queued": error is None and not task.result(),
+                "error": error,
+                # None for devices the deadline cut off before they were contacted
+                "latency": round(finished[entry.entry_id] - started[entry.entry_id], 3)
+                if entry.entry_id in finished
+                else None,
+            }
+        )
+    return results
+
+
+async def _async_apply(
+    entry: RinnaiFireplaceConfigEntry, target: dict[str, Any]
+) -> bool:
+    """Send the commands needed to reach the target state, False if queued."""
+    coordinator = entry.runtime_data.coordinator
+    commands: list[tuple[RinnaiCommand, Any]] = []
+
+    if (preset := target.get(ATTR_PRESET_MODE)) is not None:
+        eco = Eco.ON if Presets[preset] == Presets.ECO else Eco.OFF
+        commands.append((RinnaiCommand.ECO, eco))
+
+    match target[ATTR_HVAC_MODE]:
+        case HVACMode.OFF:
+            commands.append((RinnaiCommand.OP_STATE, OperationalState.STANDBY))
+        case HVACMode.HEAT:
+            temp = target.get(ATTR_TEMPERATURE)
+            if temp is None and coordinator.data is not None:
+                temp = coordinator.data.set_temp
+            if temp is None:
+                temp = RinnaiFireplaceClimate.MIN_TEMP
+            commands.append((RinnaiCommand.OP_STATE, OperationalState.ON))
+            commands.append((RinnaiCommand.TARGET_TEMP, temp))
+        case HVACMode.FAN_ONLY:
+            flame_level = target.get(ATTR_FAN_MODE)
+            if flame_level is None and coordinator.data is not None:
+                flame_level = coordinator.data.flame_level
+            if flame_level is None:
+                flame_level = RinnaiFireplaceClimate.MIN_FAN_MODE
+            commands.append((RinnaiCommand.OP_STATE, OperationalState.ON))
+            commands.append((RinnaiCommand.FLAME_LEVEL, flame_level))
+
+    for command, value in commands:
+        if await entry.runtime_data.commands.async_send(command, value):
+            # sleep for one second as otherwise we get empty packets
+            with tracing.span("services.pacing"):
+                await asyncio.sleep(COMMAND_DELAY_SECS)
+    if entry.runtime_data.commands.pending:
+        # queued until the device is back, there is nothing to refresh yet
+        return False
+    await coordinator.async_refresh()
+    return True
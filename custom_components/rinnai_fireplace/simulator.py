@@ -0,0 +1,131 @@
+"""Stand-in Rinnai Fireplace device for local testing."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+
+from .api import (
+    Eco,
+    OperationalMode,
+    OperationalState,
+    RinnaiCommand,
+    RinnaiFireplaceApiClient,
+)
+from .const import LOGGER
+
+COMMAND_PATTERN = re.compile(r"RINNAI_(\d+)(?:,([^,]*))?,E")
+
+
+class RinnaiFireplaceSimulator:
+    """Serve the RINNAI protocol on a TCP port, mimicking a fireplace."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        host: str = "127.0.0.1",
+        port: int = RinnaiFireplaceApiClient.PORT,
+        *,
+        name: str = "Simulated",
+        version: str = "0.0.0",
+        latency: float = 0.0,
+        empty_rate: float = 0.0,
+    ) -> None:
+        """Initialize the simulator."""
+        self.host = host
+        self.port = port
+        self.name = name
+        self.version = version
+        self.latency = latency
+        """Seconds to wait before answering each command."""
+        self.empty_rate = empty_rate
+        """Probability of dropping the connection without answering."""
+        self.requests = 0
+        self.operation_state = OperationalState.STANDBY
+        self.operation_mode = OperationalMode.STANDBY
+        self.economy = Eco.OFF
+        self.flame_level = 1
+        self.room_temp = 20
+        self.set_temp = 20
+        self._server: asyncio.Server | None = None
+
+    async def async_start(self) -> None:
+        """Start listening for connections."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        if self.port == 0:
+            self.port = self._server.sockets[0].getsockname()[1]
+        LOGGER.debug("Simulator %s listening on %s:%s", self.name, self.host, self.port)
+
+    async def async_stop(self) -> None:
+        """Stop listening and drop open connections."""
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    def status_payload(self) -> str:
+        """Build the RINNAI_22 status fields."""
+        fields = [
+            1,  # main power switch
+            int(self.operation_state.value, 16),
+            0,  # error code high byte
+            0,  # error code low byte
+            int(self.operation_mode.value, 16),
+            int(self.operation_mode != OperationalMode.STANDBY),
+            self.flame_level,
+            int(self.economy.value, 16),
+            0,  # lighting
+            self.room_temp,
+            self.set_temp,
+            0,  # burn speed info
+            0,  # lighting info
+            0,  # timer active
+            3,  # wifi strength
+        ]
+        return ",".join(f"{field:0>2X}" for field in fields)
+
+    def respond(self, command: int, arg: str | None) -> str:
+        """Apply a command and return the response frame."""
+        match command:
+            case RinnaiCommand.NAME:
+                return f"RINNAI_27,{self.name},E"
+            case RinnaiCommand.VERSION:
+                return f"RINNAI_10,{self.version},E"
+            case RinnaiCommand.STATUS:
+                return f"RINNAI_22,{self.status_payload()},E"
+            case RinnaiCommand.FLAME_LEVEL if arg is not None:
+                self.flame_level = int(arg, 16)
+                self.operation_mode = OperationalMode.FLAME
+            case RinnaiCommand.TARGET_TEMP if arg is not None:
+                self.set_temp = int(arg, 16)
+                self.operation_mode = OperationalMode.TEMP
+            case RinnaiCommand.OP_STATE if arg is not None:
+                self.operation_state = OperationalState(arg)
+                if self.operation_state == OperationalState.STANDBY:
+                    self.operation_mode = OperationalMode.STANDBY
+            case RinnaiCommand.ECO if arg is not None:
+                self.economy = Eco(arg)
+        if arg is None:
+            return f"RINNAI_{command},E"
+        return f"RINNAI_{command},{arg},E"
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answer commands until the client hangs up."""
+        try:
+            while data := await reader.read(1024):
+                for match in COMMAND_PATTERN.finditer(data.decode("ascii")):
+                    self.requests += 1
+                    if self.latency > 0:
+                        await asyncio.sleep(self.latency)
+                    if random.random() < self.empty_rate:  # noqa: S311
+                        return
+                    response = self.respond(int(match.group(1)), match.group(2))
+                    writer.write(response.encode("ascii"))
+                    await writer.drain()
+        except (ConnectionError, ValueError) as exception:
+            LOGGER.debug("Simulator %s dropped connection: %s", self.name, exception)
+        finally:
+            writer.close()
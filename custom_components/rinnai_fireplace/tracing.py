@@ -0,0 +1,247 @@
+"""Opt-in timeline tracing of rinnai_fireplace operations."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+import heapq
+import os
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Iterator
+
+MAX_EVENTS = 10_000
+DEFAULT_TRACK = "main"
+MAX_TRACK_NAMES = 3
+
+_NO_SPAN = contextlib.nullcontext()
+
+_track: ContextVar[str] = ContextVar(
+    "rinnai_fireplace_trace_track", default=DEFAULT_TRACK
+)
+"""The track spans of the running code go to, inherited by the tasks it starts."""
+_thread: ContextVar[tuple[asyncio.Task[Any] | None, int] | None] = ContextVar(
+    "rinnai_fireplace_trace_thread", default=None
+)
+"""The task holding a thread id and the id, inherited but not used by new tasks."""
+
+
+class TraceRecorder:
+    """
+    Records spans into a bounded ring as Chrome trace events.
+
+    Every task gets a thread of the timeline for as long as its outermost span
+    runs, so spans on one thread always nest. Threads are then reused by later
+    tasks and named after the tracks, such as one per fireplace, they showed.
+    """
+
+    def __init__(self, max_events: int = MAX_EVENTS) -> None:
+        """Initialize the recorder."""
+        self._events: deque[dict[str, Any]] = deque(maxlen=max_events)
+        self._origin = time.perf_counter()
+        self._tracks: dict[int, dict[str, None]] = {}
+        """Tracks shown by every thread, only grows with the tasks running at once."""
+        self._free: list[int] = []
+        """Heap of the thread ids no task is holding."""
+
+    def __len__(self) -> int:
+        """Return the number of recorded events."""
+        return len(self._events)
+
+    @contextlib.contextmanager
+    def span(
+        self, name: str, track: str | None, args: dict[str, Any]
+    ) -> Iterator[None]:
+        """Record the time spent in the block as a complete event."""
+        token = None if track is None else _track.set(track)
+        task = _current_task()
+        thread = _thread.get()
+        root = thread is None or thread[0] is not task
+        if root:
+            # a reused thread is named after its recent tracks only
+            args = {"track": _track.get(), **args}
+            tid = self._acquire(args["track"])
+            thread_token = _thread.set((task, tid))
+        else:
+            tid = thread[1]
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException as exception:
+            args["error"] = type(exception).__name__
+            raise
+        finally:
+            if root:
+                _thread.reset(thread_token)
+                heapq.heappush(self._free, tid)
+            if token is not None:
+                _track.reset(token)
+            self._events.append(
+                {
+                    "name": name,
+                    "cat": name.partition(".")[0],
+                    "ph": "X",
+                    "ts": self._micros(started),
+                    "dur": self._micros(time.perf_counter()) - self._micros(started),
+                    "pid": os.getpid(),
+                    "tid": tid,
+                    "args": args,
+                }
+            )
+
+    def instant(self, name: str, args: dict[str, Any]) -> None:
+        """Record a point in time, such as a retry."""
+        thread = _thread.get()
+        if thread is not None and thread[0] is _current_task():
+            tid = thread[1]
+        else:
+            # outside of any span of the task, borrow a thread for the moment
+            tid = self._acquire(_track.get())
+            heapq.heappush(self._free, tid)
+        self._events.append(
+            {
+                "name": name,
+                "cat": name.partition(".")[0],
+                "ph": "i",
+                "s": "t",
+                "ts": self._micros(time.perf_counter()),
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": args,
+            }
+        )
+
+    def export(self) -> dict[str, Any]:
+        """Return the recorded events as Chrome/Perfetto trace JSON."""
+        events = [
+            {**event, "args": _serializable(event["args"])} for event in self._events
+        ]
+        tids = {event["tid"] for event in events}
+        names = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": {"name": _thread_name(tracks)},
+            }
+            for tid, tracks in self._tracks.items()
+            if tid in tids
+        ]
+        return {"traceEvents": names + events, "displayTimeUnit": "ms"}
+
+    def _micros(self, timestamp: float) -> int:
+        """Convert a perf_counter timestamp to microseconds since the start."""
+        return int((timestamp - self._origin) * 1_000_000)
+
+    def _acquire(self, track: str) -> int:
+        """Hold the lowest free thread id for a task showing track."""
+        if self._free:
+            tid = heapq.heappop(self._free)
+        else:
+            tid = len(self._tracks) + 1
+            self._tracks[tid] = {}
+        tracks = self._tracks[tid]
+        # the latest tracks name the thread, an old one moves to the end again
+        tracks.pop(track, None)
+        tracks[track] = None
+        if len(tracks) > MAX_TRACK_NAMES:
+            del tracks[next(iter(tracks))]
+        return tid
+
+
+def _current_task() -> asyncio.Task[Any] | None:
+    """Return the running task, None outside of an event loop."""
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+def _thread_name(tracks: dict[str, None]) -> str:
+    """Name a thread after the most recent tracks it showed."""
+    return ", ".join(reversed(tracks))
+
+
+def _serializable(args: dict[str, Any]) -> dict[str, Any]:
+    """Decode the raw frames spans are given, only done when exporting."""
+    return {
+        key: value.decode("ascii", "replace") if isinstance(value, bytes) else value
+        for key, value in args.items()
+    }
+
+
+_recorder: TraceRecorder | None = None
+"""The recorder spans go to, None while tracing is off."""
+_latest: TraceRecorder | None = None
+"""The most recent recorder, kept after stopping so it can still be dumped."""
+
+
+def start(max_events: int = MAX_EVENTS) -> None:
+    """Start tracing into a new ring, dropping previously recorded events."""
+    global _recorder, _latest  # noqa: PLW0603
+    _recorder = _latest = TraceRecorder(max_events)
+
+
+def stop() -> None:
+    """Stop tracing, the recorded events can still be exported."""
+    global _recorder  # noqa: PLW0603
+    _recorder = None
+
+
+def is_enabled() -> bool:
+    """Return whether spans are being recorded."""
+    return _recorder is not None
+
+
+def export() -> dict[str, Any] | None:
+    """Return the events of the latest trace, None when nothing was traced."""
+    return None if _latest is None else _latest.export()
+
+
+def events() -> int:
+    """Return the number of events held by the latest trace."""
+    return 0 if _latest is None else len(_latest)
+
+
+def span(
+    name: str, *, track: str | None = None, **args: Any
+) -> contextlib.AbstractContextManager[None]:
+    """
+    Time a block, doing nothing while tracing is off.
+
+    The block and everything it calls go to the given track, or to the track of
+    the caller when omitted.
+    """
+    if _recorder is None:
+        return _NO_SPAN
+    return _recorder.span(name, track, args)
+
+
+def instant(name: str, **args: Any) -> None:
+    """Mark a point in time, doing nothing while tracing is off."""
+    if _recorder is not None:
+        _recorder.instant(name, args)
+
+
+def traced[**P, R](
+    name: str, track: Callable[P, str] | None = None
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """Time every call of a coroutine function, on the track named by track."""
+
+    def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            if _recorder is None:
+                return await func(*args, **kwargs)
+            with span(name, track=None if track is None else track(*args, **kwargs)):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
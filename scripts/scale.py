@@ -0,0 +1,347 @@
+# ruff: noqa: INP001 standalone script, not part of a package
+"""
+Scale test for the rinnai_fireplace integration.
+
+Boots Home Assistant with N config entries, each pointed at a stand-in device
+served in-process on its own loopback address, lets the coordinators poll for a
+fixed period and reports event loop lag, poll times, CPU time per poll, memory
+per entry and the peak number of polls and tasks in flight.
+
+Every N runs in a fresh Python process so the Home Assistant instances do not
+share state. Loopback addresses other than 127.0.0.1 are used so every stand-in
+can listen on the device port, which works out of the box on Linux.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
+
+    from custom_components.rinnai_fireplace.simulator import RinnaiFireplaceSimulator
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+LAG_PROBE_SECS = 0.05
+IDLE_SECS = 5
+"""How long the CPU use of Home Assistant without entries is measured for."""
+
+
+def _echo(message: str = "") -> None:
+    """Write a line of output."""
+    print(message)  # noqa: T201
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    """Summarise samples in milliseconds."""
+    ordered = sorted(samples)
+    return {
+        "p50": round(_percentile(ordered, 50) * 1000, 2),
+        "p99": round(_percentile(ordered, 99) * 1000, 2),
+        "max": round((ordered[-1] if ordered else 0) * 1000, 2),
+    }
+
+
+def _rss_bytes() -> int:
+    """Resident set size of this process."""
+    with Path("/proc/self/statm").open() as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _free_port() -> int:
+    """Find a free TCP port for the Home Assistant web server."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _device_host(index: int) -> str:
+    """Loopback address of the stand-in device with the given index."""
+    return f"127.1.{index // 250}.{index % 250 + 1}"
+
+
+async def _async_start_hass(config_dir: str) -> HomeAssistant:
+    """Start a bare Home Assistant with the integration loaded but no entries."""
+    from homeassistant import bootstrap, core, loader
+    from homeassistant.config import async_process_ha_core_config
+    from homeassistant.config_entries import ConfigEntries
+    from homeassistant.setup import async_setup_component
+
+    from custom_components.rinnai_fireplace.const import DOMAIN
+
+    hass = core.HomeAssistant(config_dir)
+    loader.async_setup(hass)
+    hass.config_entries = ConfigEntries(hass, {})
+    await bootstrap.async_load_base_functionality(hass)
+    await async_process_ha_core_config(hass, {})
+    await hass.async_start()
+    await async_setup_component(
+        hass,
+        "http",
+        {"http": {"server_host": "127.0.0.1", "server_port": _free_port()}},
+    )
+    # load the integration up front so its import is not counted per entry
+    await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    return hass
+
+
+async def _async_add_entries(
+    hass: HomeAssistant,
+    simulators: list[RinnaiFireplaceSimulator],
+    poll_interval: int,
+) -> list[ConfigEntry]:
+    """Add and set up one config entry per stand-in device."""
+    from homeassistant.config_entries import SOURCE_USER, ConfigEntry
+
+    from custom_components.rinnai_fireplace.const import (
+        CONF_DEVICE_NAME,
+        CONF_ID,
+        CONF_IP,
+        CONF_POLL_INTERVAL,
+        DOMAIN,
+    )
+
+    entries = [
+        ConfigEntry(
+            data={
+                CONF_ID: None,
+                CONF_IP: simulator.host,
+                CONF_DEVICE_NAME: simulator.name,
+            },
+            domain=DOMAIN,
+            minor_version=1,
+            options={CONF_POLL_INTERVAL: poll_interval},
+            source=SOURCE_USER,
+            title=simulator.name,
+            unique_id=simulator.host,
+            version=1,
+        )
+        for simulator in simulators
+    ]
+    await asyncio.gather(*(hass.config_entries.async_add(entry) for entry in entries))
+    await hass.async_block_till_done()
+    return entries
+
+
+class PollStats:
+    """Times every coordinator update and tracks how many overlap."""
+
+    def __init__(self) -> None:
+        """Initialize the statistics."""
+        self.times: list[float] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.peak_tasks = 0
+
+    def wrap(self, entries: list[ConfigEntry]) -> None:
+        """Measure the coordinator updates of the entries."""
+        for entry in entries:
+            coordinator = entry.runtime_data.coordinator
+            update = coordinator._async_update_data  # noqa: SLF001
+
+            async def _timed_update(update: Callable = update) -> Any:
+                # polls last about a millisecond, so overlap is counted here
+                # rather than by sampling, each poll holds one device connection
+                self.in_flight += 1
+                if self.in_flight > self.peak_in_flight:
+                    self.peak_in_flight = self.in_flight
+                    self.peak_tasks = max(self.peak_tasks, len(asyncio.all_tasks()))
+                started = time.monotonic()
+                try:
+                    return await update()
+                finally:
+                    self.times.append(time.monotonic() - started)
+                    self.in_flight -= 1
+
+            coordinator._async_update_data = _timed_update  # noqa: SLF001
+
+
+async def _async_sample_lag(duration: float) -> list[float]:
+    """Sample event loop lag for a while."""
+    loop = asyncio.get_running_loop()
+    lags: list[float] = []
+    deadline = loop.time() + duration
+    while loop.time() < deadline:
+        before = loop.time()
+        await asyncio.sleep(LAG_PROBE_SECS)
+        lags.append(max(0, loop.time() - before - LAG_PROBE_SECS))
+    return lags
+
+
+async def _async_run(args: argparse.Namespace) -> dict:
+    """Run one scale test in this process and return its measurements."""
+    from homeassistant.config_entries import ConfigEntryState
+
+    from custom_components.rinnai_fireplace.simulator import RinnaiFireplaceSimulator
+
+    simulators = [
+        RinnaiFireplaceSimulator(
+            _device_host(index), name=f"Scale {index}", latency=args.latency
+        )
+        for index in range(args.entries)
+    ]
+    for simulator in simulators:
+        await simulator.async_start()
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await _async_start_hass(config_dir)
+        baseline_rss = _rss_bytes()
+        baseline_tasks = len(asyncio.all_tasks())
+        # CPU Home Assistant and the lag probe use without any entries
+        idle_started = time.process_time()
+        await _async_sample_lag(IDLE_SECS)
+        idle_cpu_per_sec = (time.process_time() - idle_started) / IDLE_SECS
+
+        setup_started = time.monotonic()
+        entries = await _async_add_entries(hass, simulators, args.poll_interval)
+        setup_secs = time.monotonic() - setup_started
+        stats = PollStats()
+        stats.wrap(entries)
+
+        cpu_started = time.process_time()
+        requests_started = sum(simulator.requests for simulator in simulators)
+        lags = await _async_sample_lag(args.duration)
+        cpu_secs = time.process_time() - cpu_started
+        poll_cpu_secs = max(0, cpu_secs - idle_cpu_per_sec * args.duration)
+        requests = sum(simulator.requests for simulator in simulators)
+        polls = len(stats.times)
+
+        result = {
+            "entries": args.entries,
+            "loaded": sum(entry.state is ConfigEntryState.LOADED for entry in entries),
+            "duration": args.duration,
+            "poll_interval": args.poll_interval,
+            "setup_secs": round(setup_secs, 2),
+            "polls": polls,
+            "device_requests": requests - requests_started,
+            "loop_lag_ms": _summary(lags),
+            "poll_ms": _summary(stats.times),
+            "cpu_ms_per_poll": round(poll_cpu_secs * 1000 / polls, 3)
+            if polls
+            else None,
+            "cpu_percent": round(cpu_secs * 100 / args.duration, 1),
+            "idle_cpu_percent": round(idle_cpu_per_sec * 100, 1),
+            "memory_kib_per_entry": round(
+                (_rss_bytes() - baseline_rss) / 1024 / args.entries, 1
+            ),
+            "peak_polls_in_flight": stats.peak_in_flight,
+            "peak_tasks": max(0, stats.peak_tasks - baseline_tasks),
+        }
+        await hass.async_stop()
+
+    for simulator in simulators:
+        await simulator.async_stop()
+    return result
+
+
+def _report(results: list[dict]) -> None:
+    """Print the measurements of every run as a table."""
+    columns = [
+        ("entries", lambda r: r["entries"]),
+        ("loaded", lambda r: r["loaded"]),
+        ("setup s", lambda r: r["setup_secs"]),
+        ("polls", lambda r: r["polls"]),
+        ("lag p50", lambda r: r["loop_lag_ms"]["p50"]),
+        ("lag p99", lambda r: r["loop_lag_ms"]["p99"]),
+        ("lag max", lambda r: r["loop_lag_ms"]["max"]),
+        ("poll p50", lambda r: r["poll_ms"]["p50"]),
+        ("poll p99", lambda r: r["poll_ms"]["p99"]),
+        ("cpu ms/poll", lambda r: r["cpu_ms_per_poll"]),
+        ("cpu %", lambda r: r["cpu_percent"]),
+        ("idle cpu %", lambda r: r["idle_cpu_percent"]),
+        ("KiB/entry", lambda r: r["memory_kib_per_entry"]),
+        ("in flight", lambda r: r["peak_polls_in_flight"]),
+        ("tasks", lambda r: r["peak_tasks"]),
+    ]
+    rows = [[name for name, _ in columns]]
+    rows += [[str(value(result)) for _, value in columns] for result in results]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    for row in rows:
+        _echo(
+            "  ".join(
+                cell.rjust(width) for cell, width in zip(row, widths, strict=True)
+            )
+        )
+    _echo()
+    _echo("Times are in milliseconds. CPU per poll excludes the idle Home Assistant")
+    _echo("CPU but includes the stand-in devices' side. In flight is the most polls")
+    _echo("running at once, each holding one device connection, tasks are the peak")
+    _echo("above the idle Home Assistant baseline.")
+
+
+def main() -> None:
+    """Run the scale test for every requested number of entries."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--duration", type=float, default=60, help="seconds to measure")
+    parser.add_argument(
+        "--poll-interval", type=int, default=15, help="seconds between polls"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0, help="stand-in response delay"
+    )
+    parser.add_argument("--json", type=Path, help="also write the results here")
+    parser.add_argument("--run", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        # child process: one size only, results on stdout
+        args.entries = args.entries[0]
+        sys.stdout.write(json.dumps(asyncio.run(_async_run(args))))
+        return
+
+    results = []
+    for entries in args.entries:
+        _echo(f"Running {entries} entries for {timedelta(seconds=args.duration)}...")
+        completed = subprocess.run(  # noqa: S603
+            [
+                sys.executable,
+                __file__,
+                "--run",
+                "--entries",
+                str(entries),
+                "--duration",
+                str(args.duration),
+                "--poll-interval",
+                str(args.poll_interval),
+                "--latency",
+                str(args.latency),
+            ],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        results.append(json.loads(completed.stdout.splitlines()[-1]))
+    _echo()
+    _report(results)
+    if args.json is not None:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()